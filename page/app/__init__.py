@@ -1,8 +1,5 @@
 from flask import Flask
 from app.config.config import Config
-import app.views as bp
-import tensorflow as tf
-import numpy as np
 import os
 
 UPLOAD_FOLDER = 'upload'
@@ -14,5 +11,7 @@ def create_app():
 
     os.makedirs(UPLOAD_FOLDER, exist_ok = True)
     app.config.from_object(Config)
+    # Import views ở đây (view load model khi import): script chỉ cần app.utils không phải load TF/model
+    import app.views as bp
     bp.init_app(app)
     return app
@@ -0,0 +1,71 @@
+# Build index embedding cho toàn bộ data/train để tìm ảnh tương tự / ảnh trùng
+#   python app/build_index.py --data ../data/train --model fruit_model_full.h5 --out index --nlist 256
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import tensorflow as tf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.embedding import Embedder
+from app.services.vector_index import VectorIndex
+from app.utils.file_utils import FileUtils
+
+
+def list_images(data_dir):
+    # data/train/<tên class>/<ảnh>
+    items = []
+    for label in sorted(os.listdir(data_dir)):
+        class_dir = os.path.join(data_dir, label)
+        if not os.path.isdir(class_dir):
+            continue
+        for name in sorted(os.listdir(class_dir)):
+            if FileUtils.allowed_file(name):
+                items.append({'path': os.path.join(label, name), 'label': label})
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build vector index từ embedding của model")
+    parser.add_argument('--data', default='../data/train')
+    parser.add_argument('--model', default='fruit_model_full.h5')
+    parser.add_argument('--out', default='index')
+    parser.add_argument('--nlist', type=int, default=None,
+                        help="Số cụm IVF (0 = tìm vét cạn, mặc định tự chọn theo số ảnh)")
+    parser.add_argument('--batch-size', type=int, default=256)
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.model)
+    target_size = tuple(model.input_shape[1:3])
+    items = list_images(args.data)
+    print(f"Tìm thấy {len(items)} ảnh trong {args.data}")
+
+    start = time.time()
+    embeddings, kept = [], []
+    for i in range(0, len(items), args.batch_size):
+        batch, batch_items = [], []
+        for item in items[i:i + args.batch_size]:
+            img_array = FileUtils.preprocess(os.path.join(args.data, item['path']), target_size)
+            if img_array is not None:
+                batch.append(img_array)
+                batch_items.append(item)
+        if batch:
+            embeddings.append(Embedder.embed(model, np.concatenate(batch, axis=0)))
+            kept.extend(batch_items)
+        print(f"  {min(i + args.batch_size, len(items))}/{len(items)}", end='\r')
+
+    if not kept:
+        print("Không có ảnh nào để index")
+        return
+
+    nlist = VectorIndex.auto_nlist(len(kept)) if args.nlist is None else args.nlist
+    index = VectorIndex.build(args.out, np.concatenate(embeddings, axis=0), kept,
+                              nlist=nlist, model_version=os.path.basename(args.model))
+    print(f"\nĐã index {len(index)} vector ({index.meta['dim']} chiều, nlist={nlist}) vào {args.out} "
+          f"trong {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
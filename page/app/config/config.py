@@ -2,3 +2,11 @@ import os
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY','my_secret') or 'you-will-never-guess'
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///data.db')
+    # Đủ cho ảnh JPEG 50 MP; giới hạn thật là số pixel / cạnh đọc từ header ảnh
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 64 * 1024 * 1024))
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+    MODEL_DIR = os.getenv('MODEL_DIR', 'models')
+    # Trạng thái model (active/candidate/split) dùng chung cho mọi worker
+    MODEL_MANIFEST = os.getenv('MODEL_MANIFEST', os.path.join(MODEL_DIR, 'manifest.json'))
+    INDEX_DIR = os.getenv('INDEX_DIR', 'index')
+    INDEX_IN_MEMORY = os.getenv('INDEX_IN_MEMORY', '0') == '1'
@@ -158,3 +158,20 @@ for fruit_name in FRUITS_CLASS:
         "name": fruit_name,
         "nutrition": nutrition
     })
+
+# Phân cấp họ (family) -> giống (variety): "Apple Red 1" thuộc họ "Apple"
+FRUIT_FAMILIES = []
+CLASS_TO_FAMILY = []
+for fruit_name in FRUITS_CLASS:
+    family = fruit_name.split()[0]
+    if family not in FRUIT_FAMILIES:
+        FRUIT_FAMILIES.append(family)
+    CLASS_TO_FAMILY.append(FRUIT_FAMILIES.index(family))
+
+FAMILIES_DATA = [
+    {
+        "name": family,
+        "nutrition": FRUIT_NUTRITION_INFO.get(family, FRUIT_NUTRITION_INFO["Default"])
+    }
+    for family in FRUIT_FAMILIES
+]
@@ -0,0 +1,240 @@
+# Profile model: thời gian / FLOPs / bộ nhớ activation / kích thước tham số theo từng layer,
+# và latency end-to-end tách theo đường tiền xử lý (cv2 hoặc PIL).
+#   python app/profile_model.py --model fruit_model_full.h5 --samples app/static/uploads
+#   tensorboard --logdir logs/profile      # xem trace offline (tab Profile)
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import numpy as np
+import tensorflow as tf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.file_utils import FileUtils
+
+try:
+    import cv2
+    from app.utils.image_decode import decode_image
+except ImportError:
+    cv2 = None
+
+
+def summarize(times):
+    if not times:
+        return None
+    times = np.array(times) * 1000
+    return {
+        'mean': round(float(times.mean()), 3),
+        'p50': round(float(np.percentile(times, 50)), 3),
+        'p95': round(float(np.percentile(times, 95)), 3),
+    }
+
+
+def layer_flops(layer, input_shape, output_shape):
+    # FLOPs cho MỘT mẫu (nhân + cộng tính là 2 FLOPs)
+    out_elements = int(np.prod(output_shape[1:]))
+    in_elements = int(np.prod(input_shape[1:]))
+    if isinstance(layer, tf.keras.layers.DepthwiseConv2D):
+        kh, kw = layer.kernel_size
+        return 2 * kh * kw * out_elements
+    if isinstance(layer, tf.keras.layers.SeparableConv2D):
+        kh, kw = layer.kernel_size
+        cin = input_shape[-1]
+        spatial = int(np.prod(output_shape[1:-1]))
+        depthwise = 2 * kh * kw * cin * layer.depth_multiplier * spatial
+        pointwise = 2 * cin * layer.depth_multiplier * out_elements
+        return depthwise + pointwise
+    if isinstance(layer, tf.keras.layers.Conv2D):
+        kh, kw = layer.kernel_size
+        cin = input_shape[-1] // layer.groups
+        return 2 * kh * kw * cin * out_elements
+    if isinstance(layer, tf.keras.layers.Dense):
+        return 2 * input_shape[-1] * out_elements
+    if isinstance(layer, (tf.keras.layers.MaxPooling2D, tf.keras.layers.AveragePooling2D)):
+        ph, pw = layer.pool_size
+        return ph * pw * out_elements
+    if isinstance(layer, (tf.keras.layers.GlobalAveragePooling2D, tf.keras.layers.GlobalMaxPooling2D)):
+        return in_elements
+    if isinstance(layer, tf.keras.layers.BatchNormalization):
+        return 2 * out_elements
+    if isinstance(layer, (tf.keras.layers.Activation, tf.keras.layers.ReLU, tf.keras.layers.Softmax)):
+        return out_elements
+    activation = getattr(layer, 'activation', None)
+    return 0 if activation is None else out_elements
+
+
+def run_model(model, x):
+    # Gọi model trực tiếp như ModelRegistry.predict để đo đúng latency lúc serve
+    return np.asarray(model(x, training=False))
+
+
+def param_bytes(layer):
+    return int(sum(np.prod(w.shape) * np.dtype(w.dtype).itemsize for w in layer.weights))
+
+
+def profile_layers(model, batch, runs):
+    # Chạy lần lượt từng layer trên output của layer trước (model dạng Sequential / chuỗi tuyến tính)
+    layers = [layer for layer in model.layers if not isinstance(layer, tf.keras.layers.InputLayer)]
+    x = tf.convert_to_tensor(batch)
+    report = []
+    for layer in layers:
+        try:
+            y = layer(x, training=False)
+        except Exception as e:
+            raise ValueError(f"Layer {layer.name} không nhận output của layer trước "
+                             f"(model không phải chuỗi tuyến tính?): {e}")
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            with tf.profiler.experimental.Trace(layer.name):
+                y = layer(x, training=False)
+                y.numpy()
+            times.append(time.perf_counter() - start)
+
+        flops = layer_flops(layer, tuple(x.shape), tuple(y.shape))
+        report.append({
+            'name': layer.name,
+            'type': layer.__class__.__name__,
+            'output_shape': list(y.shape[1:]),
+            'time_ms': summarize(times),
+            'flops_per_sample': int(flops),
+            'flops_batch': int(flops * len(batch)),
+            'activation_bytes': int(y.numpy().nbytes),
+            'params': int(layer.count_params()),
+            'param_bytes': param_bytes(layer),
+        })
+        x = y
+
+    total_ms = sum(layer['time_ms']['mean'] for layer in report)
+    for layer in report:
+        layer['time_share'] = round(layer['time_ms']['mean'] / total_ms, 4) if total_ms else 0.0
+    return report
+
+
+def cv2_preprocess(data, target_size):
+    # Cùng đường decode với src (kiểm tra header, JPEG decode ở độ phân giải giảm)
+    image = decode_image(data, target_size)
+    image = cv2.resize(image, target_size)
+    return np.expand_dims(image / 255.0, axis=0)
+
+
+def profile_sources(model, paths, target_size, runs):
+    sources = {'pil': lambda path, data: FileUtils.preprocess(path, target_size)}
+    if cv2 is not None:
+        sources['cv2'] = lambda path, data: cv2_preprocess(data, target_size)
+
+    report = {}
+    for source, preprocess in sources.items():
+        pre_times, infer_times, total_times, failed = [], [], [], []
+        for path in paths:
+            # Ảnh lỗi / định dạng mà nguồn này không decode được (vd. GIF với cv2) thì bỏ qua và ghi lại
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                for _ in range(runs):
+                    start = time.perf_counter()
+                    img_array = preprocess(path, data)
+                    if img_array is None:
+                        raise ValueError("Không decode được ảnh")
+                    mid = time.perf_counter()
+                    run_model(model, img_array)
+                    end = time.perf_counter()
+                    pre_times.append(mid - start)
+                    infer_times.append(end - mid)
+                    total_times.append(end - start)
+            except Exception as e:
+                failed.append({'path': path, 'error': str(e)})
+        report[source] = {
+            'samples': len(pre_times),
+            'failed': failed,
+            'preprocess_ms': summarize(pre_times),
+            'inference_ms': summarize(infer_times),
+            'total_ms': summarize(total_times),
+        }
+    return report
+
+
+def load_batch(paths, target_size, batch_size):
+    arrays = [FileUtils.preprocess(path, target_size) for path in paths]
+    arrays = [a for a in arrays if a is not None]
+    if not arrays:
+        print("Không có ảnh mẫu, dùng batch ngẫu nhiên")
+        return np.random.rand(batch_size, *target_size, 3).astype(np.float32)
+    arrays = (arrays * (batch_size // len(arrays) + 1))[:batch_size]
+    return np.concatenate(arrays, axis=0).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile model theo từng layer và theo đường tiền xử lý")
+    parser.add_argument('--model', default='fruit_model_full.h5')
+    parser.add_argument('--samples', default='app/static/uploads', help="Thư mục ảnh mẫu")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--out', default='profile_report.json')
+    parser.add_argument('--logdir', default='logs/profile', help="Thư mục trace TensorBoard ('' = tắt)")
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.model)
+    target_size = tuple(model.input_shape[1:3])
+    paths = sorted(p for p in glob.glob(os.path.join(args.samples, '*')) if FileUtils.allowed_file(p))
+    batch = load_batch(paths, target_size, args.batch_size)
+    run_model(model, batch)  # warmup
+
+    if args.logdir:
+        tf.profiler.experimental.start(args.logdir)
+    try:
+        layers = profile_layers(model, batch, args.runs)
+        batch_times = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            with tf.profiler.experimental.Trace('model_batch'):
+                run_model(model, batch)
+            batch_times.append(time.perf_counter() - start)
+    finally:
+        if args.logdir:
+            tf.profiler.experimental.stop()
+
+    report = {
+        'model': args.model,
+        'input_shape': list(model.input_shape[1:]),
+        'output_shape': list(model.output_shape[1:]),
+        'batch_size': len(batch),
+        'runs': args.runs,
+        'total_params': int(model.count_params()),
+        'total_param_bytes': sum(layer['param_bytes'] for layer in layers),
+        'total_flops_per_sample': sum(layer['flops_per_sample'] for layer in layers),
+        # Chỉ là output lớn nhất của một layer, không phải đỉnh bộ nhớ (chưa cộng input đang giữ)
+        'max_layer_activation_bytes': max(layer['activation_bytes'] for layer in layers),
+        'batch_latency_ms': summarize(batch_times),
+        'layers': layers,
+        'sources': profile_sources(model, paths, target_size, args.runs) if paths else {},
+        'trace_dir': args.logdir or None,
+    }
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("=" * 90)
+    print(f"{'LAYER':<28}{'TYPE':<20}{'ms':>9}{'%':>7}{'MFLOPs':>11}{'ACT KB':>10}{'PARAM KB':>10}")
+    print("=" * 90)
+    for layer in layers:
+        print(f"{layer['name'][:27]:<28}{layer['type'][:19]:<20}{layer['time_ms']['mean']:>9.3f}"
+              f"{100 * layer['time_share']:>7.1f}{layer['flops_per_sample'] / 1e6:>11.2f}"
+              f"{layer['activation_bytes'] / 1024:>10.0f}{layer['param_bytes'] / 1024:>10.0f}")
+    print("=" * 90)
+    print(f"Batch {len(batch)}: {report['batch_latency_ms']['mean']:.2f} ms, "
+          f"{report['total_flops_per_sample'] / 1e6:.2f} MFLOPs/ảnh")
+    for source, stats in report['sources'].items():
+        if stats['failed']:
+            print(f"{source}: bỏ qua {len(stats['failed'])} ảnh lỗi")
+        if not stats['samples']:
+            continue
+        print(f"{source}: preprocess {stats['preprocess_ms']['mean']:.2f} ms, "
+              f"inference {stats['inference_ms']['mean']:.2f} ms, total {stats['total_ms']['mean']:.2f} ms")
+    print(f"Report: {args.out}" + (f" | Trace: {args.logdir}" if args.logdir else ""))
+
+
+if __name__ == "__main__":
+    main()
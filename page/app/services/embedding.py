@@ -0,0 +1,34 @@
+import threading
+import numpy as np
+import tensorflow as tf
+
+
+class Embedder:
+    """Lấy embedding từ layer áp chót (trước Dense softmax) của model phân loại."""
+
+    lock = threading.Lock()
+    cache = {}
+
+    @staticmethod
+    def embedding_model(model):
+        # Sub-model được build một lần cho mỗi model và dùng lại
+        key = id(model)
+        with Embedder.lock:
+            cached = Embedder.cache.get(key)
+            if cached is None or cached[0] is not model:
+                # Model một input: truyền tensor thay vì list để gọi trực tiếp không bị cảnh báo cấu trúc input
+                inputs = model.inputs[0] if len(model.inputs) == 1 else model.inputs
+                sub_model = tf.keras.Model(inputs=inputs, outputs=model.layers[-2].output)
+                cached = (model, sub_model)
+                Embedder.cache = {key: cached}
+            return cached[1]
+
+    @staticmethod
+    def embed(model, img_array, batch_size=256):
+        sub_model = Embedder.embedding_model(model)
+        # Gọi sub-model trực tiếp theo từng batch: tránh overhead của predict() cho mỗi upload
+        embeddings = np.concatenate([
+            np.asarray(sub_model(img_array[i:i + batch_size], training=False))
+            for i in range(0, len(img_array), batch_size)
+        ], axis=0)
+        return embeddings.reshape(len(embeddings), -1).astype(np.float32)
@@ -0,0 +1,63 @@
+import numpy as np
+from app.const.MATCH_DATA import CLASS_TO_FAMILY, FAMILIES_DATA, FRUITS_DATA
+from app.services.model_registry import family_registry, registry
+from app.services.predict import Predict
+
+LEVELS = ('family', 'variety')
+
+# Tính sẵn từ FRUITS_CLASS: ma trận (số class x số họ) để cộng xác suất các giống
+# trong cùng họ, và danh sách index class của từng họ
+FAMILY_MATRIX = np.zeros((len(CLASS_TO_FAMILY), len(FAMILIES_DATA)), dtype=np.float32)
+FAMILY_MATRIX[np.arange(len(CLASS_TO_FAMILY)), CLASS_TO_FAMILY] = 1.0
+FAMILY_MEMBERS = [np.flatnonzero(FAMILY_MATRIX[:, i]) for i in range(len(FAMILIES_DATA))]
+
+
+class HierarchicalPredict:
+
+    @staticmethod
+    def describe(data, probability):
+        probability = float(probability)
+        return {
+            **data,
+            "probability": round(probability, 4),
+            "confidence": Predict.get_qualification_of_image(probability)
+        }
+
+    @staticmethod
+    def predict(img_array, level='family'):
+        """Dự đoán họ trái cây, và giống nếu level='variety'.
+
+        Chỉ cần họ và có model họ (family_registry) thì chạy model nhỏ đó; còn lại chạy
+        model chi tiết rồi cộng xác suất theo họ. Giống được chọn trong họ đã dự đoán
+        nên hai cấp luôn khớp nhau.
+        """
+        if level not in LEVELS:
+            raise ValueError(f"level phải là một trong {LEVELS}")
+
+        if level == 'family' and family_registry.active is not None:
+            entry, predictions = family_registry.predict(img_array)
+            family_idx = int(np.argmax(predictions[0]))
+            return {
+                "level": level,
+                "source": "family_model",
+                "model_version": entry.version,
+                "family": HierarchicalPredict.describe(FAMILIES_DATA[family_idx], predictions[0][family_idx]),
+                "variety": None
+            }
+
+        entry, predictions = registry.predict(img_array)
+        fine_probs = predictions[0]
+        family_probs = fine_probs @ FAMILY_MATRIX
+        family_idx = int(np.argmax(family_probs))
+        result = {
+            "level": level,
+            "source": "fine_model",
+            "model_version": entry.version,
+            "family": HierarchicalPredict.describe(FAMILIES_DATA[family_idx], family_probs[family_idx]),
+            "variety": None
+        }
+        if level == 'variety':
+            members = FAMILY_MEMBERS[family_idx]
+            class_idx = int(members[np.argmax(fine_probs[members])])
+            result["variety"] = HierarchicalPredict.describe(FRUITS_DATA[class_idx], fine_probs[class_idx])
+        return result
@@ -0,0 +1,53 @@
+import json
+import os
+import threading
+from flask import current_app
+from app.services.model_registry import REGISTRIES
+
+# Registry nằm trong bộ nhớ của từng process. Chạy nhiều worker (gunicorn ...) thì
+# request admin chỉ tới một worker, nên trạng thái mong muốn được ghi ra file
+# manifest; mỗi worker thấy manifest đổi (mtime) thì tự apply. Worker khởi động
+# lại cũng lấy đúng model đã promote thay vì model mặc định.
+sync_lock = threading.Lock()
+synced_mtime = None
+
+
+def read_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def update_manifest(name, **changes):
+    # Ghi file tạm rồi os.replace để worker khác không đọc phải file ghi dở
+    path = current_app.config['MODEL_MANIFEST']
+    with sync_lock:
+        manifest = read_manifest(path)
+        manifest.setdefault(name, {}).update(changes)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(path + '.tmp', path)
+
+
+def sync_models():
+    # Gọi trước mỗi request: chỉ tốn một os.stat khi manifest không đổi
+    global synced_mtime
+    path = current_app.config['MODEL_MANIFEST']
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return
+    with sync_lock:
+        if mtime == synced_mtime:
+            return
+        synced_mtime = mtime
+        manifest = read_manifest(path)
+    for name, state in manifest.items():
+        if name in REGISTRIES:
+            try:
+                REGISTRIES[name].apply(state)
+            except ValueError as e:
+                print(f" Error applying model manifest ({name}): {e}")
@@ -0,0 +1,226 @@
+import collections
+import os
+import random
+import threading
+import time
+import numpy as np
+import tensorflow as tf
+from app.const.MATCH_DATA import FAMILIES_DATA, FRUITS_DATA
+
+STATS_WINDOW = 1000
+LOW_CONFIDENCE = 0.7
+MAX_FINISHED_JOBS = 20
+
+
+class ModelStats:
+    def __init__(self, window=STATS_WINDOW):
+        self.lock = threading.Lock()
+        self.latencies = collections.deque(maxlen=window)
+        self.confidences = collections.deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+
+    def record(self, latency, confidence):
+        with self.lock:
+            self.requests += 1
+            self.latencies.append(latency)
+            self.confidences.append(confidence)
+
+    def record_error(self):
+        with self.lock:
+            self.requests += 1
+            self.errors += 1
+
+    def snapshot(self):
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            confidences = np.array(self.confidences)
+            requests, errors = self.requests, self.errors
+        if len(latencies) == 0:
+            return {'requests': requests, 'errors': errors}
+        return {
+            'requests': requests,
+            'errors': errors,
+            'latency_ms': {
+                'mean': round(float(latencies.mean()), 2),
+                'p50': round(float(np.percentile(latencies, 50)), 2),
+                'p95': round(float(np.percentile(latencies, 95)), 2),
+            },
+            'confidence': {
+                'mean': round(float(confidences.mean()), 4),
+                'low_rate': round(float((confidences < LOW_CONFIDENCE).mean()), 4),
+            },
+        }
+
+
+class ModelVersion:
+    def __init__(self, version, path, model):
+        self.version = version
+        self.path = path
+        self.model = model
+        self.loaded_at = time.time()
+        self.stats = ModelStats()
+
+    def info(self):
+        return {
+            'version': self.version,
+            'path': self.path,
+            'loaded_at': self.loaded_at,
+            'stats': self.stats.snapshot(),
+        }
+
+
+class ModelRegistry:
+    """Giữ model đang chạy (active) và model thử nghiệm (candidate).
+
+    Mỗi request lấy tham chiếu tới một ModelVersion rồi dùng nó đến hết request,
+    nên đổi model chỉ là gán lại tham chiếu dưới lock: request đang chạy vẫn
+    dùng model cũ, request mới dùng model mới, không request nào bị rơi.
+    """
+
+    def __init__(self, num_classes=None):
+        # Số output model phải có (khớp bảng nhãn); None = không kiểm tra
+        self.num_classes = num_classes
+        self.lock = threading.Lock()
+        self.active = None
+        self.candidate = None
+        self.candidate_percent = 0.0
+        self.jobs = {}
+
+    @staticmethod
+    def warmup(model, runs=2):
+        # Chạy thử vài lần để TF build graph / cấp phát bộ nhớ trước khi nhận traffic thật
+        dummy = np.zeros((1,) + tuple(model.input_shape[1:]), dtype=np.float32)
+        for _ in range(runs):
+            np.asarray(model(dummy, training=False))
+
+    def load(self, path, version=None, role='active'):
+        if role not in ('active', 'candidate'):
+            raise ValueError(f"role không hợp lệ: {role}")
+        version = version or path
+        model = tf.keras.models.load_model(path)
+        outputs = model.output_shape[-1]
+        if self.num_classes is not None and outputs != self.num_classes:
+            # Không cài model sai số class: mọi request sau đó sẽ lỗi IndexError
+            raise ValueError(f"Model có {outputs} output, cần {self.num_classes}")
+        self.warmup(model)
+        entry = ModelVersion(version, path, model)
+        with self.lock:
+            if role == 'active':
+                self.active = entry
+            else:
+                self.candidate = entry
+        return entry
+
+    def load_async(self, path, version=None, role='active'):
+        version = version or path
+        # Theo cả role: cùng model có thể đang load làm candidate khi manifest đã promote nó
+        key = (role, version)
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is not None and job['status'] == 'loading':
+                return dict(job)
+            self.jobs.pop(key, None)
+            self._prune_jobs()
+            job = {'version': version, 'path': path, 'role': role, 'status': 'loading', 'started_at': time.time()}
+            self.jobs[key] = job
+            snapshot = dict(job)
+
+        def run():
+            # Cập nhật job dưới lock: status() / load_async() chỉ đọc bản copy
+            try:
+                self.load(path, version, role)
+                update = {'status': 'ready'}
+            except Exception as e:
+                update = {'status': 'failed', 'error': str(e)}
+            update['finished_at'] = time.time()
+            with self.lock:
+                job.update(update)
+
+        threading.Thread(target=run, name=f"load-{version}", daemon=True).start()
+        return snapshot
+
+    def _prune_jobs(self):
+        # Gọi khi đang giữ self.lock: chỉ giữ MAX_FINISHED_JOBS job đã xong gần nhất
+        finished = [key for key, job in self.jobs.items() if job['status'] != 'loading']
+        for key in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[key]
+
+    def promote(self):
+        with self.lock:
+            if self.candidate is None:
+                raise ValueError("Chưa có model candidate")
+            self.active, self.candidate = self.candidate, None
+            self.candidate_percent = 0.0
+            return self.active
+
+    def drop_candidate(self):
+        with self.lock:
+            self.candidate = None
+            self.candidate_percent = 0.0
+
+    def set_split(self, percent):
+        percent = float(percent)
+        if not 0 <= percent <= 100:
+            raise ValueError("percent phải nằm trong khoảng 0-100")
+        with self.lock:
+            self.candidate_percent = percent
+
+    def pick(self):
+        with self.lock:
+            active, candidate, percent = self.active, self.candidate, self.candidate_percent
+        if candidate is not None and random.random() * 100 < percent:
+            return candidate
+        if active is None:
+            raise RuntimeError("Model chưa được load")
+        return active
+
+    def predict(self, img_array):
+        entry = self.pick()
+        start = time.perf_counter()
+        try:
+            # Gọi model trực tiếp: với batch nhỏ nhanh hơn model.predict() cả chục lần
+            predictions = np.asarray(entry.model(img_array, training=False))
+        except Exception:
+            entry.stats.record_error()
+            raise
+        entry.stats.record(time.perf_counter() - start, float(np.max(predictions[0])))
+        return entry, predictions
+
+    def apply(self, state):
+        # Đưa registry về trạng thái mong muốn trong manifest (xem model_manifest.py)
+        active = state.get('active')
+        if active and (self.active is None or self.active.version != active['version']):
+            if self.candidate is not None and self.candidate.version == active['version']:
+                self.promote()
+            else:
+                self.load_async(active['path'], active['version'], 'active')
+        if 'candidate' in state:
+            candidate = state['candidate']
+            if candidate is None:
+                if self.candidate is not None:
+                    self.drop_candidate()
+            elif self.candidate is None or self.candidate.version != candidate['version']:
+                self.load_async(candidate['path'], candidate['version'], 'candidate')
+        if 'candidate_percent' in state:
+            self.set_split(state['candidate_percent'])
+
+    def status(self):
+        with self.lock:
+            active, candidate, percent = self.active, self.candidate, self.candidate_percent
+            jobs = [dict(job) for job in self.jobs.values()]
+        return {
+            # Thống kê và job là của riêng process (worker) trả lời request này
+            'worker': os.getpid(),
+            'active': active.info() if active else None,
+            'candidate': candidate.info() if candidate else None,
+            'candidate_percent': percent,
+            'jobs': jobs,
+        }
+
+
+registry = ModelRegistry(num_classes=len(FRUITS_DATA))
+# Model nhỏ chỉ phân loại họ trái cây (tuỳ chọn, dùng cho chế độ phân cấp)
+family_registry = ModelRegistry(num_classes=len(FAMILIES_DATA))
+# Tên dùng trong ?model= của admin và trong file manifest
+REGISTRIES = {'fine': registry, 'family': family_registry}
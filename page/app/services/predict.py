@@ -1,5 +1,3 @@
-import numpy as np
-from app.const.MATCH_DATA import FRUITS_DATA
 class Predict:
     
     def get_qualification_of_image(confidence):
@@ -19,16 +17,3 @@ class Predict:
                 'criteria': 'Độ tin cậy thấp, cần kiểm tra lại'
             }
 
-    
-    @staticmethod
-    def predict(model, img_array):
-        # send data through api
-        predictions = model.predict(img_array)
-        predictions_class_index = np.argmax(predictions[0])
-        predictions_fruit = FRUITS_DATA[predictions_class_index]
-        confidence = float(predictions[0][predictions_class_index])
-        return {
-            **predictions_fruit,
-            "confidence":Predict.get_qualification_of_image(confidence)
-        }
-        
\ No newline at end of file
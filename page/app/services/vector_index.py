@@ -0,0 +1,178 @@
+import json
+import os
+import uuid
+import numpy as np
+
+# Tên file cũ (index build trước khi tên file được ghi trong meta.json)
+VECTORS_FILE = 'vectors.npy'
+IVF_FILE = 'ivf.npz'
+META_FILE = 'meta.json'
+SEARCH_CHUNK = 65536
+AUTO_IVF_MIN_VECTORS = 5000  # ít hơn thì tìm vét cạn vẫn đủ nhanh
+DUPLICATE_SCORE = 0.98
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def kmeans(vectors, n_clusters, iterations=10, sample_size=50000, seed=0):
+    # K-means cosine đơn giản bằng NumPy, train trên một mẫu con cho nhanh
+    rng = np.random.default_rng(seed)
+    if len(vectors) > sample_size:
+        vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(n_clusters):
+            members = vectors[assign == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = normalize(centroids)
+    return centroids
+
+
+class VectorIndex:
+    """Index embedding lưu dạng float16 đã chuẩn hoá L2 trong file .npy (memory-mapped).
+
+    Tìm kiếm theo cosine similarity bằng phép nhân ma trận NumPy. Nếu build với
+    nlist > 0 thì các vector được nhóm theo cụm k-means (IVF) và lưu liên tiếp
+    theo cụm, khi tìm chỉ quét nprobe cụm gần query nhất.
+    Với vài trăm nghìn vector nên dùng IVF (auto_nlist), vì tìm vét cạn phải đổi
+    toàn bộ float16 -> float32 mỗi lần query (hoặc load với in_memory=True).
+    """
+
+    def __init__(self, directory, vectors, items, meta, centroids=None, offsets=None, meta_mtime=None):
+        self.directory = directory
+        self.vectors = vectors
+        self.items = items
+        self.meta = meta
+        self.centroids = centroids
+        self.offsets = offsets
+        self.meta_mtime = meta_mtime
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @staticmethod
+    def auto_nlist(count):
+        # Quy tắc thường dùng cho IVF: khoảng 4 * sqrt(N) cụm
+        return int(4 * np.sqrt(count)) if count >= AUTO_IVF_MIN_VECTORS else 0
+
+    @staticmethod
+    def build(directory, embeddings, items, nlist=0, model_version=None):
+        # Không ghi đè file đang được process khác memory-map (sẽ bị SIGBUS):
+        # ghi vector/IVF ra file tên mới, rồi os.replace meta.json trỏ sang file mới.
+        os.makedirs(directory, exist_ok=True)
+        vectors = normalize(embeddings)
+        items = list(items)
+        build_id = uuid.uuid4().hex[:12]
+        vectors_file = f'vectors-{build_id}.npy'
+        ivf_file = None
+
+        nlist = min(nlist, len(vectors))
+        if nlist:
+            centroids = kmeans(vectors, nlist)
+            assign = np.concatenate([
+                np.argmax(vectors[i:i + SEARCH_CHUNK] @ centroids.T, axis=1)
+                for i in range(0, len(vectors), SEARCH_CHUNK)
+            ])
+            # Sắp xếp theo cụm để mỗi cụm là một đoạn liên tiếp trong file
+            order = np.argsort(assign, kind='stable')
+            vectors = vectors[order]
+            items = [items[i] for i in order]
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))])
+            ivf_file = f'ivf-{build_id}.npz'
+            np.savez(os.path.join(directory, ivf_file), centroids=centroids, offsets=offsets)
+
+        stored = np.lib.format.open_memmap(os.path.join(directory, vectors_file), mode='w+',
+                                           dtype=np.float16, shape=vectors.shape)
+        stored[:] = vectors
+        stored.flush()
+        del stored
+
+        meta = {
+            'count': len(vectors),
+            'dim': int(vectors.shape[1]),
+            'dtype': 'float16',
+            'nlist': int(nlist),
+            'model_version': model_version,
+            'vectors_file': vectors_file,
+            'ivf_file': ivf_file,
+            'items': items,
+        }
+        meta_path = os.path.join(directory, META_FILE)
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_path + '.tmp', meta_path)
+        VectorIndex._remove_old_files(directory, keep={vectors_file, ivf_file})
+        return VectorIndex.load(directory)
+
+    @staticmethod
+    def _remove_old_files(directory, keep):
+        # Process đang map file cũ vẫn đọc được (inode chỉ bị xoá khi unmap)
+        for name in os.listdir(directory):
+            if name in keep or not name.startswith(('vectors', 'ivf')):
+                continue
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+    @staticmethod
+    def load(directory, in_memory=False):
+        meta_path = os.path.join(directory, META_FILE)
+        # stat trước khi đọc: nếu meta.json bị thay giữa chừng thì lần sau is_stale() vẫn thấy
+        meta_mtime = os.stat(meta_path).st_mtime_ns
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        items = meta.pop('items')
+        vectors = np.load(os.path.join(directory, meta.get('vectors_file', VECTORS_FILE)), mmap_mode='r')
+        if in_memory:
+            # Đổi sẵn sang float32 trong RAM: tốn gấp đôi bộ nhớ nhưng tìm vét cạn nhanh hơn nhiều
+            vectors = np.asarray(vectors, dtype=np.float32)
+        centroids = offsets = None
+        ivf_file = meta.get('ivf_file', IVF_FILE if meta.get('nlist') else None)
+        if ivf_file:
+            ivf = np.load(os.path.join(directory, ivf_file))
+            centroids, offsets = ivf['centroids'], ivf['offsets']
+        return VectorIndex(directory, vectors, items, meta, centroids, offsets, meta_mtime)
+
+    def is_stale(self):
+        # meta.json được os.replace khi build lại
+        try:
+            return os.stat(os.path.join(self.directory, META_FILE)).st_mtime_ns != self.meta_mtime
+        except OSError:
+            return False
+
+    def _ranges(self, query, nprobe):
+        if self.centroids is None:
+            return [(0, len(self.vectors))]
+        nprobe = min(nprobe, len(self.centroids))
+        nearest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return [(int(self.offsets[c]), int(self.offsets[c + 1])) for c in sorted(nearest)]
+
+    def search(self, query, k=5, nprobe=8):
+        query = normalize(np.reshape(query, (1, -1)))[0]
+        ids, scores = [], []
+        for start, end in self._ranges(query, nprobe):
+            # float16 -> float32 theo từng chunk để matmul dùng BLAS và RAM không tăng theo N
+            for i in range(start, end, SEARCH_CHUNK):
+                block = np.asarray(self.vectors[i:min(i + SEARCH_CHUNK, end)], dtype=np.float32)
+                block_scores = block @ query
+                top = min(k, len(block_scores))
+                best = np.argpartition(-block_scores, top - 1)[:top]
+                ids.append(best + i)
+                scores.append(block_scores[best])
+        if not ids:
+            return []
+        ids, scores = np.concatenate(ids), np.concatenate(scores)
+        order = np.argsort(-scores)[:k]
+        return [{
+            'id': int(ids[j]),
+            'item': self.items[ids[j]],
+            'score': round(float(scores[j]), 4),
+            'duplicate': bool(scores[j] >= DUPLICATE_SCORE),
+        } for j in order]
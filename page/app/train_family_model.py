@@ -0,0 +1,61 @@
+# Train model nhỏ chỉ phân loại HỌ trái cây (Apple, Banana, ...) từ data/train,
+# dùng cho chế độ phân cấp: request chỉ cần họ thì chạy model này thay vì model chi tiết.
+#   python app/train_family_model.py --data ../data/train --out fruit_family_model.h5
+import argparse
+import os
+import sys
+import tensorflow as tf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.const.MATCH_DATA import FRUIT_FAMILIES
+
+IMG_SIZE = (100, 100)  # giống model chi tiết để dùng chung một lần tiền xử lý
+
+
+def build_model(num_families):
+    # Ít filter + GlobalAveragePooling thay cho Flatten/Dense lớn: rẻ hơn nhiều so với model chi tiết
+    return tf.keras.Sequential([
+        tf.keras.Input(shape=IMG_SIZE + (3,)),
+        tf.keras.layers.Conv2D(16, 3, strides=2, activation='relu'),
+        tf.keras.layers.Conv2D(32, 3, strides=2, activation='relu'),
+        tf.keras.layers.Conv2D(64, 3, strides=2, activation='relu'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(num_families, activation='softmax'),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train model phân loại họ trái cây")
+    parser.add_argument('--data', default='../data/train')
+    parser.add_argument('--out', default='fruit_family_model.h5')
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    train_ds, val_ds = tf.keras.utils.image_dataset_from_directory(
+        args.data, image_size=IMG_SIZE, batch_size=args.batch_size,
+        validation_split=0.1, subset='both', seed=0)
+
+    # Thư mục "Apple Red 1" -> index họ "Apple" trong FRUIT_FAMILIES
+    unknown = [name for name in train_ds.class_names if name.split()[0] not in FRUIT_FAMILIES]
+    if unknown:
+        raise ValueError(f"Không có trong FRUITS_CLASS: {unknown}")
+    to_family = tf.constant([FRUIT_FAMILIES.index(name.split()[0]) for name in train_ds.class_names])
+
+    def prepare(images, labels):
+        return images / 255.0, tf.gather(to_family, labels)
+
+    train_ds = train_ds.map(prepare).prefetch(tf.data.AUTOTUNE)
+    val_ds = val_ds.map(prepare).prefetch(tf.data.AUTOTUNE)
+
+    model = build_model(len(FRUIT_FAMILIES))
+    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    model.summary()
+    model.fit(train_ds, validation_data=val_ds, epochs=args.epochs)
+    model.save(args.out)
+    print(f"Đã lưu model họ ({len(FRUIT_FAMILIES)} họ, {model.count_params()} tham số) vào {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,43 @@
 
 from PIL import Image
 import numpy as np
+from app.utils.image_header import check_image_header
+
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+ALLOWED_FORMATS = {'png', 'jpeg', 'gif', 'webp'}
 
 class FileUtils:
     @staticmethod
     def allowed_file(filename):
         return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-    
+
+    @staticmethod
+    def check_image(data):
+        # Kiểm tra magic bytes + kích thước trong header trước khi lưu / decode
+        return check_image_header(data, ALLOWED_FORMATS)
+
     @staticmethod
     def preprocess(image_file, target_size = (100,100), gray_mode = False):
         try:
             img = Image.open(image_file)
-            
+
+            # JPEG: decode thẳng ở 1/2, 1/4 hoặc 1/8 độ phân giải (vẫn >= target_size)
+            if img.format == 'JPEG':
+                img.draft(img.mode, target_size)
+
             if(img.mode != 'RGB' and not gray_mode):
                 img = img.convert('RGB')
-            
+
             img = img.resize(target_size)
-            
+
             img_array = np.array(img)
-            
+
             img_array = img_array / 255.0
-            
+
             img_array = np.expand_dims(img_array, axis=0)
-            
+
             return img_array
         except Exception as e:
             print(f"Error preprocessing img: {e}")
             return
-            
\ No newline at end of file
+
@@ -0,0 +1,29 @@
+# image_decode.py
+# Kiểm tra ảnh upload TRƯỚC khi decode (xem image_header.py) và decode JPEG ở
+# độ phân giải giảm để ảnh 50 MP từ điện thoại không phải decode đầy đủ chỉ để
+# resize về 100x100.
+import cv2
+import numpy as np
+
+from app.utils.image_header import check_image_header, reduced_scale
+
+_CV2_REDUCED_FLAGS = {8: cv2.IMREAD_REDUCED_COLOR_8,
+                      4: cv2.IMREAD_REDUCED_COLOR_4,
+                      2: cv2.IMREAD_REDUCED_COLOR_2}
+
+
+def reduced_imread_flag(width, height, target_size):
+    # Chọn hệ số giảm lớn nhất mà ảnh vẫn không nhỏ hơn target_size
+    return _CV2_REDUCED_FLAGS.get(reduced_scale(width, height, target_size), cv2.IMREAD_COLOR)
+
+
+def decode_image(data, target_size, allowed_formats=('jpeg', 'png', 'webp')):
+    """Decode ảnh upload với giới hạn kích thước; JPEG được decode ở độ phân giải giảm."""
+    fmt, width, height = check_image_header(data, allowed_formats)
+    flag = cv2.IMREAD_COLOR
+    if fmt == 'jpeg':
+        flag = reduced_imread_flag(width, height, target_size)
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    if image is None:
+        raise ValueError("Không decode được ảnh")
+    return image
@@ -0,0 +1,108 @@
+# image_header.py (dùng chung cho web app và các script trong src/)
+# Đọc định dạng + kích thước ảnh chỉ từ header (magic bytes), không decode.
+# Chỉ dùng thư viện chuẩn để cả src/ và page/app (FileUtils) import chung một bản.
+import struct
+
+# Giới hạn số pixel theo định dạng. JPEG được decode ở 1/2, 1/4, 1/8 nên cho phép lớn hơn,
+# PNG/GIF/WebP luôn phải decode đầy đủ nên giới hạn chặt hơn.
+MAX_IMAGE_PIXELS = {'jpeg': 100_000_000, 'png': 25_000_000, 'gif': 25_000_000, 'webp': 25_000_000}
+MAX_IMAGE_SIDE = 20000
+
+# Các marker SOF chứa kích thước ảnh (bỏ DHT=C4, JPG=C8, DAC=CC)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def sniff_image_format(data):
+    if data[:3] == b'\xff\xd8\xff':
+        return 'jpeg'
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'png'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def jpeg_size(data):
+    # Duyệt các segment theo độ dài, không decode dữ liệu ảnh
+    i = 2
+    n = len(data)
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:          # byte đệm
+            i += 1
+            continue
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        if marker == 0xD9 or marker == 0xDA:  # EOI / SOS mà chưa gặp SOF
+            return None
+        length = struct.unpack('>H', data[i + 2:i + 4])[0]
+        if marker in JPEG_SOF_MARKERS:
+            if i + 9 > n:
+                return None
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    return None
+
+
+def webp_size(data):
+    # VP8 (lossy), VP8L (lossless) và VP8X (extended) lưu kích thước ở vị trí khác nhau
+    if len(data) < 30:
+        return None
+    chunk = data[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L':
+        bits = struct.unpack('<I', data[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        width = int.from_bytes(data[24:27], 'little') + 1
+        height = int.from_bytes(data[27:30], 'little') + 1
+        return width, height
+    return None
+
+
+def read_image_header(data):
+    """Trả về (format, width, height) chỉ từ header; None nếu không phải ảnh hợp lệ."""
+    fmt = sniff_image_format(data)
+    size = None
+    if fmt == 'jpeg':
+        size = jpeg_size(data)
+    elif fmt == 'png' and len(data) >= 24 and data[12:16] == b'IHDR':
+        size = struct.unpack('>II', data[16:24])
+    elif fmt == 'gif' and len(data) >= 10:
+        size = struct.unpack('<HH', data[6:10])
+    elif fmt == 'webp':
+        size = webp_size(data)
+    if size is None:
+        return None
+    return fmt, size[0], size[1]
+
+
+def check_image_header(data, allowed_formats):
+    """Kiểm tra magic bytes và kích thước; raise ValueError nếu không hợp lệ."""
+    header = read_image_header(data)
+    if header is None or header[0] not in allowed_formats:
+        raise ValueError("Nội dung file không phải ảnh hợp lệ")
+    fmt, width, height = header
+    if width == 0 or height == 0:
+        raise ValueError("Kích thước ảnh không hợp lệ")
+    if max(width, height) > MAX_IMAGE_SIDE or width * height > MAX_IMAGE_PIXELS[fmt]:
+        raise ValueError(f"Ảnh quá lớn ({width}x{height})")
+    return fmt, width, height
+
+
+def reduced_scale(width, height, target_size, scales=(8, 4, 2)):
+    """Hệ số giảm lớn nhất (decode 1/scale) mà ảnh vẫn không nhỏ hơn target_size; 1 nếu không giảm được."""
+    target_w, target_h = target_size
+    for scale in scales:
+        if width // scale >= target_w and height // scale >= target_h:
+            return scale
+    return 1
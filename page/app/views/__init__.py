@@ -1,4 +1,10 @@
 from .index_view import index_bp
+from .admin_view import admin_bp
+from .api_view import api_bp
+from app.services.model_manifest import sync_models
 
 def init_app(app):
-    app.register_blueprint(index_bp, url_prefix='/')
\ No newline at end of file
+    app.before_request(sync_models)
+    app.register_blueprint(index_bp, url_prefix='/')
+    app.register_blueprint(admin_bp, url_prefix='/admin')
+    app.register_blueprint(api_bp, url_prefix='/api')
@@ -0,0 +1,95 @@
+import hmac
+import os
+from flask import Blueprint, current_app, jsonify, request
+from app.services.model_manifest import update_manifest
+from app.services.model_registry import REGISTRIES
+
+admin_bp = Blueprint('admin', __name__)
+
+
+@admin_bp.before_request
+def check_admin():
+    # Bắt buộc header X-Admin-Token; chưa cấu hình ADMIN_TOKEN thì tắt hẳn admin
+    # (không tin remote_addr vì app có thể chạy sau reverse proxy trên cùng máy)
+    token = current_app.config.get('ADMIN_TOKEN')
+    if not token:
+        return jsonify(error="Admin chưa được bật (thiếu ADMIN_TOKEN)"), 403
+    given = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(given.encode('utf-8'), token.encode('utf-8')):
+        return jsonify(error="Không có quyền"), 403
+
+
+def resolve_model_path(path):
+    # Chỉ cho load model nằm trong MODEL_DIR: file .h5 có thể chứa Lambda layer chạy code tuỳ ý
+    model_dir = os.path.realpath(current_app.config['MODEL_DIR'])
+    resolved = os.path.realpath(os.path.join(model_dir, path))
+    if os.path.commonpath([model_dir, resolved]) != model_dir:
+        raise ValueError("path phải nằm trong MODEL_DIR")
+    if not os.path.isfile(resolved):
+        raise ValueError("Không tìm thấy file model")
+    return resolved
+
+
+def target_name():
+    # ?model=family để quản lý model họ, mặc định là model chi tiết
+    return 'family' if request.args.get('model') == 'family' else 'fine'
+
+
+def target_registry():
+    return REGISTRIES[target_name()]
+
+
+@admin_bp.route('/models', methods=['GET'])
+def models_status():
+    return jsonify(target_registry().status())
+
+
+@admin_bp.route('/models', methods=['POST'])
+def load_model():
+    # {"path": "...h5" (tương đối trong MODEL_DIR), "version": "v2", "role": "active" | "candidate"}
+    data = request.get_json(silent=True) or {}
+    path = data.get('path')
+    role = data.get('role', 'candidate')
+    if not path:
+        return jsonify(error="Thiếu path"), 400
+    if role not in ('active', 'candidate'):
+        return jsonify(error="role phải là active hoặc candidate"), 400
+    try:
+        resolved = resolve_model_path(path)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    version = data.get('version') or path
+    job = target_registry().load_async(resolved, version, role)
+    # Worker khác load theo manifest
+    update_manifest(target_name(), **{role: {'path': resolved, 'version': version}})
+    return jsonify(job), 202
+
+
+@admin_bp.route('/models/promote', methods=['POST'])
+def promote_model():
+    try:
+        entry = target_registry().promote()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    update_manifest(target_name(), active={'path': entry.path, 'version': entry.version},
+                    candidate=None, candidate_percent=0.0)
+    return jsonify(active=entry.version)
+
+
+@admin_bp.route('/models/split', methods=['POST'])
+def set_split():
+    # {"percent": 10} -> 10% traffic sang candidate
+    data = request.get_json(silent=True) or {}
+    try:
+        target_registry().set_split(data.get('percent', 0))
+    except (TypeError, ValueError) as e:
+        return jsonify(error=str(e)), 400
+    update_manifest(target_name(), candidate_percent=target_registry().candidate_percent)
+    return jsonify(candidate_percent=target_registry().candidate_percent)
+
+
+@admin_bp.route('/models/candidate', methods=['DELETE'])
+def drop_candidate():
+    target_registry().drop_candidate()
+    update_manifest(target_name(), candidate=None, candidate_percent=0.0)
+    return jsonify(candidate=None)
@@ -0,0 +1,101 @@
+import io
+import threading
+from flask import Blueprint, current_app, jsonify, request
+from app.services.embedding import Embedder
+from app.services.hierarchy import HierarchicalPredict, LEVELS
+from app.services.model_registry import registry
+from app.services.vector_index import VectorIndex
+from app.utils.file_utils import FileUtils
+
+api_bp = Blueprint('api', __name__)
+
+index_lock = threading.Lock()
+loaded_index = None
+
+
+def get_index():
+    # Load index (memory-mapped) một lần, load lại khi build_index ghi meta.json mới
+    global loaded_index
+    directory = current_app.config['INDEX_DIR']
+    with index_lock:
+        if loaded_index is None or loaded_index.directory != directory:
+            loaded_index = VectorIndex.load(directory, current_app.config['INDEX_IN_MEMORY'])
+        elif loaded_index.is_stale():
+            try:
+                loaded_index = VectorIndex.load(directory, current_app.config['INDEX_IN_MEMORY'])
+            except OSError:
+                # Đang build lại giữa chừng: dùng tiếp index cũ (vẫn còn được map), lần sau thử lại
+                pass
+        return loaded_index
+
+
+def read_upload():
+    file = request.files.get('fruit_image') or request.files.get('file')
+    if file is None or file.filename == '':
+        raise ValueError("Không tìm thấy file ảnh!")
+    if not FileUtils.allowed_file(file.filename):
+        raise ValueError("Định dạng file không hợp lệ!")
+    data = file.read()
+    FileUtils.check_image(data)
+    img_array = FileUtils.preprocess(io.BytesIO(data))
+    if img_array is None:
+        raise ValueError("Lỗi khi xử lý ảnh!")
+    return img_array
+
+
+def embed_upload():
+    img_array = read_upload()
+    entry = registry.active
+    if entry is None:
+        raise RuntimeError("Model chưa được load")
+    return entry, Embedder.embed(entry.model, img_array)[0]
+
+
+@api_bp.route('/embedding', methods=['POST'])
+def embedding():
+    try:
+        entry, vector = embed_upload()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    except RuntimeError as e:
+        return jsonify(error=str(e)), 503
+    return jsonify(model_version=entry.version, dim=len(vector), embedding=vector.tolist())
+
+
+@api_bp.route('/similar', methods=['POST'])
+def similar():
+    k = request.args.get('k', 5, type=int)
+    nprobe = request.args.get('nprobe', 8, type=int)
+    try:
+        entry, vector = embed_upload()
+        index = get_index()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    except (RuntimeError, OSError) as e:
+        return jsonify(error=str(e)), 503
+
+    if index.meta['dim'] != len(vector):
+        return jsonify(error="Index không khớp với model hiện tại, cần build lại"), 409
+
+    neighbors = index.search(vector, k=max(1, min(k, 100)), nprobe=max(1, nprobe))
+    return jsonify(
+        model_version=entry.version,
+        index_model_version=index.meta.get('model_version'),
+        neighbors=neighbors,
+    )
+
+
+@api_bp.route('/predict', methods=['POST'])
+def predict():
+    # ?level=family (mặc định, nhanh) hoặc ?level=variety (trả về cả họ và giống)
+    level = request.args.get('level', 'family')
+    if level not in LEVELS:
+        return jsonify(error=f"level phải là một trong {LEVELS}"), 400
+    try:
+        img_array = read_upload()
+        result = HierarchicalPredict.predict(img_array, level)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    except RuntimeError as e:
+        return jsonify(error=str(e)), 503
+    return jsonify(result)
@@ -1,23 +1,39 @@
-from flask import Blueprint, render_template, request, url_for
+from flask import Blueprint, current_app, jsonify, render_template, request, url_for
 from app.utils.file_utils import FileUtils
-from app.services.predict import Predict
-import tensorflow as tf
+from app.services.hierarchy import HierarchicalPredict, LEVELS
+from app.services.model_registry import family_registry, registry
 import os
 from werkzeug.utils import secure_filename
 
 MODEL_PATH = 'fruit_model_full.h5'
+FAMILY_MODEL_PATH = 'fruit_family_model.h5'
 UPLOAD_FOLDER = 'app/static/uploads'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 try:
-    model = tf.keras.models.load_model(MODEL_PATH)
+    registry.load(MODEL_PATH, version=os.path.basename(MODEL_PATH))
     print(" Model loaded successfully")
 except Exception as e:
     print(f" Error loading model: {e}")
-    model = None
+
+# Model họ là tuỳ chọn: không có thì chế độ family dùng model chi tiết
+if os.path.exists(FAMILY_MODEL_PATH):
+    try:
+        family_registry.load(FAMILY_MODEL_PATH, version=os.path.basename(FAMILY_MODEL_PATH))
+        print(" Family model loaded successfully")
+    except Exception as e:
+        print(f" Error loading family model: {e}")
 
 index_bp = Blueprint('index', __name__)
 
+@index_bp.app_errorhandler(413)
+def file_too_large(e):
+    error = f"File quá lớn (tối đa {current_app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB)"
+    if not request.path.startswith(('/api', '/admin')):
+        return render_template('index.html', result=None, error=error), 413
+    return jsonify(error=error), 413
+
+
 @index_bp.route('/')
 def index():
     return render_template('index.html')
@@ -36,16 +52,31 @@ def predict():
     if not FileUtils.allowed_file(file.filename):
         return render_template('index.html', result=None, error="Định dạng file không hợp lệ!")
 
+    # Kiểm tra định dạng thật + kích thước từ header trước khi lưu / decode
+    data = file.read()
+    try:
+        FileUtils.check_image(data)
+    except ValueError as e:
+        return render_template('index.html', result=None, error=str(e))
+
     try:
         filename = secure_filename(file.filename)
         save_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(save_path)
+        with open(save_path, 'wb') as f:
+            f.write(data)
 
         img_array = FileUtils.preprocess(save_path)
         if img_array is None:
             return render_template('index.html', result=None, error="Lỗi khi xử lý ảnh!")
 
-        result = Predict.predict(model, img_array)
+        # Mặc định chỉ nhận diện họ (giống /api/predict), chọn 'variety' khi cần cả giống
+        level = request.form.get('level', 'family')
+        if level not in LEVELS:
+            level = 'family'
+        prediction = HierarchicalPredict.predict(img_array, level)
+        result = prediction["variety"] or prediction["family"]
+        result["family"] = prediction["family"]["name"]
+        result["model_version"] = prediction["model_version"]
 
         result["image_url"] = url_for('static', filename=f'uploads/{filename}')
 
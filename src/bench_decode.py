@@ -0,0 +1,96 @@
+# bench_decode.py
+# So sánh thời gian decode ảnh upload lớn: decode full-size rồi resize (cũ)
+# với kiểm tra header + decode ở độ phân giải giảm (mới).
+#   python bench_decode.py                 # ảnh JPEG tổng hợp 8160x6120 (~50 MP)
+#   python bench_decode.py photo.jpg --repeat 10
+import argparse
+import io
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from utils import decode_image, read_image_header
+
+IMG_SIZE = (100, 100)
+
+
+def make_jpeg(width, height):
+    # Gradient + nhiễu để JPEG có kích thước giống ảnh chụp thật
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    img = np.stack([np.broadcast_to(x, (height, width)),
+                    np.broadcast_to(y, (height, width)),
+                    np.full((height, width), 128, np.float32)], axis=-1)
+    img += rng.normal(0, 20, img.shape).astype(np.float32)
+    ok, buf = cv2.imencode('.jpg', np.clip(img, 0, 255).astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return buf.tobytes()
+
+
+def cv2_full(data):
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    return image, cv2.resize(image, IMG_SIZE)
+
+
+def cv2_reduced(data):
+    image = decode_image(data, IMG_SIZE)
+    return image, cv2.resize(image, IMG_SIZE)
+
+
+def pil_full(data):
+    img = Image.open(io.BytesIO(data)).convert('RGB')
+    return img, img.resize(IMG_SIZE)
+
+
+def pil_draft(data):
+    img = Image.open(io.BytesIO(data))
+    img.draft(img.mode, IMG_SIZE)
+    img = img.convert('RGB')
+    return img, img.resize(IMG_SIZE)
+
+
+def decoded_bytes(image):
+    if isinstance(image, Image.Image):
+        return image.size[0] * image.size[1] * len(image.getbands())
+    return image.nbytes
+
+
+def bench(fn, data, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        image, _ = fn(data)
+        times.append(time.perf_counter() - start)
+    return 1000 * float(np.median(times)), decoded_bytes(image)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('image', nargs='?', help="Ảnh JPEG để đo (mặc định: ảnh tổng hợp)")
+    parser.add_argument('--width', type=int, default=8160)
+    parser.add_argument('--height', type=int, default=6120)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, 'rb') as f:
+            data = f.read()
+    else:
+        data = make_jpeg(args.width, args.height)
+
+    start = time.perf_counter()
+    header = read_image_header(data)
+    header_ms = 1000 * (time.perf_counter() - start)
+    print(f"Ảnh: {header} - {len(data) / 1e6:.1f} MB, đọc header: {header_ms:.3f} ms")
+
+    print(f"{'path':<14}{'median ms':>12}{'decoded MB':>12}")
+    for name, fn in [('cv2 full', cv2_full), ('cv2 reduced', cv2_reduced),
+                     ('PIL full', pil_full), ('PIL draft', pil_draft)]:
+        ms, nbytes = bench(fn, data, args.repeat)
+        print(f"{name:<14}{ms:>12.1f}{nbytes / 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+# camera_service.py
+# Chạy nhiều camera / RTSP / file video cùng lúc với MỘT model dùng chung.
+#   python camera_service.py 0 1 rtsp://10.0.0.5/stream ../data/predict/demo.mp4 --port 8765
+# Mỗi nguồn được đọc trên một thread riêng, vùng quét của tất cả các luồng được
+# gom thành batch và đưa vào một worker suy luận duy nhất (xoay vòng công bằng).
+# Kết quả được publish theo từng luồng qua HTTP (JSON) và/hoặc JSON lines.
+import argparse
+import collections
+import json
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+from predict_camera import crop_scan_zone, draw_result, predict_batch, scan_zone_bounds
+
+# CẤU HÌNH
+PREDICT_INTERVAL = 0.5   # giây giữa hai lần gửi vùng quét của cùng một luồng
+MAX_BATCH_SIZE = 8
+STATS_WINDOW = 30        # số mẫu dùng để tính FPS / latency trung bình
+RECONNECT_DELAY = 2.0    # giây chờ trước khi mở lại camera / RTSP bị mất
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+
+def parse_source(source):
+    # "0" -> camera index 0, còn lại giữ nguyên (RTSP URL hoặc đường dẫn file)
+    return int(source) if source.isdigit() else source
+
+
+def is_video_file(source):
+    return isinstance(source, str) and source.lower().endswith(VIDEO_EXTENSIONS)
+
+
+# THỐNG KÊ
+class StreamStats:
+    def __init__(self, window=STATS_WINDOW):
+        self.lock = threading.Lock()
+        self.capture_times = collections.deque(maxlen=window)
+        self.infer_times = collections.deque(maxlen=window)
+        self.latencies = collections.deque(maxlen=window)
+        self.frames = 0
+        self.inferences = 0
+        self.dropped = 0
+
+    @staticmethod
+    def _rate(times):
+        if len(times) < 2 or times[-1] == times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def on_frame(self, ts):
+        with self.lock:
+            self.frames += 1
+            self.capture_times.append(ts)
+
+    def on_drop(self):
+        with self.lock:
+            self.dropped += 1
+
+    def on_result(self, ts, latency):
+        with self.lock:
+            self.inferences += 1
+            self.infer_times.append(ts)
+            self.latencies.append(latency)
+
+    def snapshot(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            return {
+                "frames": self.frames,
+                "inferences": self.inferences,
+                "dropped": self.dropped,
+                "capture_fps": round(self._rate(self.capture_times), 2),
+                "inference_fps": round(self._rate(self.infer_times), 2),
+                "latency_ms_avg": round(1000 * sum(latencies) / len(latencies), 1) if latencies else None,
+                "latency_ms_max": round(1000 * latencies[-1], 1) if latencies else None,
+            }
+
+
+# PUBLISH KẾT QUẢ
+class ResultFeed:
+    def __init__(self, jsonl=None):
+        self.lock = threading.Lock()
+        self.latest = {}
+        self.subscribers = []
+        self.jsonl = jsonl
+
+    def publish(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self.lock:
+            self.latest[record["stream"]] = record
+            if self.jsonl is not None:
+                self.jsonl.write(line + "\n")
+                self.jsonl.flush()
+            subscribers = list(self.subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(line)
+            except queue.Full:
+                pass  # client đọc chậm thì bỏ bớt, không chặn worker
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=100)
+        with self.lock:
+            self.subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            if q in self.subscribers:
+                self.subscribers.remove(q)
+
+    def get(self, stream_id=None):
+        with self.lock:
+            if stream_id is None:
+                return dict(self.latest)
+            return self.latest.get(stream_id)
+
+
+# WORKER SUY LUẬN DÙNG CHUNG
+class InferenceWorker(threading.Thread):
+    def __init__(self, feed, max_batch=MAX_BATCH_SIZE):
+        super().__init__(name="inference-worker", daemon=True)
+        self.feed = feed
+        self.max_batch = max_batch
+        self.cond = threading.Condition()
+        self.pending = {}                   # stream_id -> (crop, capture_ts)
+        self.order = collections.deque()    # thứ tự xoay vòng giữa các luồng
+        self.streams = {}
+        self.running = True
+
+    def register(self, stream):
+        with self.cond:
+            self.streams[stream.stream_id] = stream
+            self.order.append(stream.stream_id)
+
+    def submit(self, stream_id, crop, ts):
+        with self.cond:
+            # Chỉ giữ vùng quét mới nhất của mỗi luồng: frame cũ chưa kịp xử lý bị thay thế
+            if stream_id in self.pending:
+                self.streams[stream_id].stats.on_drop()
+            self.pending[stream_id] = (crop, ts)
+            self.cond.notify()
+
+    def _take_batch(self):
+        with self.cond:
+            while self.running and not self.pending:
+                self.cond.wait(0.1)
+            ids = [sid for sid in self.order if sid in self.pending][:self.max_batch]
+            # Luồng vừa được phục vụ xuống cuối hàng để luồng khác không bị bỏ đói
+            for sid in ids:
+                self.order.remove(sid)
+                self.order.append(sid)
+            return [(sid, *self.pending.pop(sid)) for sid in ids]
+
+    def run(self):
+        while self.running:
+            batch = self._take_batch()
+            if not batch:
+                continue
+            try:
+                results = predict_batch([crop for _, crop, _ in batch])
+            except Exception as e:
+                # Không để một batch lỗi làm chết worker duy nhất: báo lỗi cho từng luồng rồi chạy tiếp
+                print(f"Lỗi inference worker: {e}", file=sys.stderr)
+                results = [{"error": str(e)}] * len(batch)
+            now = time.time()
+            for (sid, _, ts), result in zip(batch, results):
+                stream = self.streams[sid]
+                latency = now - ts
+                stream.stats.on_result(now, latency)
+                stream.result = result if result is not None and "error" not in result else None
+                self.feed.publish({
+                    "stream": sid,
+                    "source": str(stream.source),
+                    "timestamp": now,
+                    "latency_ms": round(1000 * latency, 1),
+                    "batch_size": len(batch),
+                    "result": result,
+                })
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+
+# THREAD ĐỌC CAMERA
+class StreamReader(threading.Thread):
+    def __init__(self, stream_id, source, worker, interval=PREDICT_INTERVAL, loop=False):
+        super().__init__(name=f"reader-{stream_id}", daemon=True)
+        self.stream_id = stream_id
+        self.source = source
+        self.worker = worker
+        self.interval = interval
+        self.loop = loop
+        self.stats = StreamStats()
+        self.frame = None
+        self.result = None
+        self.running = True
+        self.finished = False
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.source)
+        if isinstance(self.source, int):
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        return cap
+
+    def run(self):
+        cap = self._open()
+        last_submit = 0
+        while self.running:
+            if not cap.isOpened():
+                print(f"[{self.stream_id}] Không mở được nguồn {self.source}")
+                cap.release()
+                if is_video_file(self.source):
+                    break
+                time.sleep(RECONNECT_DELAY)
+                cap = self._open()
+                continue
+
+            ret, frame = cap.read()
+            if not ret:
+                if is_video_file(self.source):
+                    if not self.loop:
+                        break
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                # Camera / RTSP bị ngắt: mở lại
+                cap.release()
+                time.sleep(RECONNECT_DELAY)
+                cap = self._open()
+                continue
+
+            now = time.time()
+            self.stats.on_frame(now)
+            self.frame = frame
+            if now - last_submit > self.interval:
+                self.worker.submit(self.stream_id, crop_scan_zone(frame), now)
+                last_submit = now
+
+            if is_video_file(self.source):
+                # File video: đọc theo tốc độ gốc thay vì nhanh nhất có thể
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                if fps > 0:
+                    time.sleep(max(0.0, 1.0 / fps - (time.time() - now)))
+
+        cap.release()
+        self.finished = True
+
+    def stop(self):
+        self.running = False
+
+
+# HTTP
+def make_handler(feed, readers):
+    class FeedHandler(BaseHTTPRequestHandler):
+        def _send_json(self, data, status=200):
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parts = [p for p in self.path.split('?')[0].split('/') if p]
+            if parts == ['streams']:
+                return self._send_json(feed.get())
+            if len(parts) == 2 and parts[0] == 'streams':
+                record = feed.get(parts[1])
+                if record is None:
+                    return self._send_json({'error': 'Không có luồng này'}, 404)
+                return self._send_json(record)
+            if parts == ['stats']:
+                return self._send_json({
+                    r.stream_id: {"source": str(r.source), **r.stats.snapshot()} for r in readers
+                })
+            if parts == ['feed']:
+                return self._stream_feed()
+            return self._send_json({'error': 'Not found'}, 404)
+
+        def _stream_feed(self):
+            # JSON lines liên tục, mỗi dòng là một kết quả (curl http://host:port/feed)
+            q = feed.subscribe()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.end_headers()
+            try:
+                while True:
+                    try:
+                        line = q.get(timeout=1.0)
+                    except queue.Empty:
+                        continue
+                    self.wfile.write((line + "\n").encode('utf-8'))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                feed.unsubscribe(q)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FeedHandler
+
+
+# HIỂN THỊ (tuỳ chọn)
+def show_frames(readers):
+    for reader in readers:
+        if reader.frame is None:
+            continue
+        frame = reader.frame.copy()
+        x1, y1, x2, y2 = scan_zone_bounds(frame)
+        color = (0, 255, 0) if reader.result else (0, 0, 255)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
+        draw_result(frame, reader.result)
+        stats = reader.stats.snapshot()
+        cv2.putText(frame, f"FPS: {stats['capture_fps']:.1f}", (frame.shape[1] - 150, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+        cv2.imshow(f"Fruit Scanner - {reader.stream_id}", frame)
+    return cv2.waitKey(1) & 0xFF == ord('q')
+
+
+# MAIN
+def main():
+    parser = argparse.ArgumentParser(description="Nhận diện trái cây trên nhiều luồng camera")
+    parser.add_argument('sources', nargs='+', help="Camera index, RTSP URL hoặc file video")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765, help="Cổng HTTP (0 = tắt)")
+    parser.add_argument('--jsonl', help="Ghi kết quả dạng JSON lines ('-' = stdout)")
+    parser.add_argument('--batch-size', type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument('--interval', type=float, default=PREDICT_INTERVAL)
+    parser.add_argument('--stats-every', type=float, default=5.0, help="In thống kê mỗi N giây (0 = tắt)")
+    parser.add_argument('--loop', action='store_true', help="Phát lại file video khi hết")
+    parser.add_argument('--show', action='store_true', help="Hiển thị cửa sổ cv2 (mặc định chạy headless)")
+    args = parser.parse_args()
+
+    jsonl = None
+    if args.jsonl == '-':
+        jsonl = sys.stdout
+    elif args.jsonl:
+        jsonl = open(args.jsonl, 'a', encoding='utf-8')
+
+    feed = ResultFeed(jsonl)
+    worker = InferenceWorker(feed, max_batch=args.batch_size)
+    readers = []
+    for i, source in enumerate(args.sources):
+        reader = StreamReader(f"cam{i}", parse_source(source), worker, args.interval, args.loop)
+        worker.register(reader)
+        readers.append(reader)
+
+    server = None
+    if args.port:
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(feed, readers))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"HTTP: http://{args.host}:{args.port}/streams | /stats | /feed")
+
+    worker.start()
+    for reader in readers:
+        reader.start()
+    print(f"Đang chạy {len(readers)} luồng. Nhấn Ctrl+C để thoát.")
+
+    last_stats = time.time()
+    try:
+        while not all(r.finished for r in readers):
+            if args.show:
+                if show_frames(readers):
+                    break
+            else:
+                time.sleep(0.1)
+            if args.stats_every and time.time() - last_stats > args.stats_every:
+                for reader in readers:
+                    print(f"[{reader.stream_id}] {reader.stats.snapshot()}", file=sys.stderr)
+                last_stats = time.time()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for reader in readers:
+            reader.stop()
+        worker.stop()
+        if server is not None:
+            server.shutdown()
+        if args.show:
+            cv2.destroyAllWindows()
+        if jsonl is not None and jsonl is not sys.stdout:
+            jsonl.close()
+
+
+if __name__ == "__main__":
+    main()
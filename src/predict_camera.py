@@ -52,33 +52,8 @@ def preprocess_frame(frame):
 # DỰ ĐOÁN 
 CONFIDENCE_THRESHOLD = 0.70
 
-def predict(frame):
-    if model is None:
-        # Dummy mode nếu sai model
-        import random
-        fruit_idx = random.randint(0, len(FRUIT_CLASSES)-1)
-        fruit_prob = random.uniform(0.85, 0.99)
-        quality_idx = random.randint(0, 2)
-        defect_idx = 0
-        max_confidence = fruit_prob
-    else:
-        img = preprocess_frame(frame)
-        try:
-            outputs = model.predict(img, verbose=0)
-            fruit_probs = outputs[0]
-            # quality_probs = outputs[1][0]
-            # defect_probs = outputs[2][0]
-
-            fruit_idx = np.argmax(fruit_probs)
-            fruit_prob = fruit_probs[fruit_idx]
-            quality_idx = 0
-            defect_idx = 0
-            max_confidence = fruit_prob
-        except Exception as e:
-            print(f"Lỗi predict: {e}")
-            return None
-
-    if max_confidence < CONFIDENCE_THRESHOLD:
+def build_result(fruit_idx, fruit_prob, quality_idx=0, defect_idx=0):
+    if fruit_prob < CONFIDENCE_THRESHOLD:
         return {"error": "low_confidence"}
 
     raw_class = FRUIT_CLASSES[fruit_idx]
@@ -92,6 +67,63 @@ def predict(frame):
         "defect": DEFECT_LABELS[defect_idx]
     }
 
+def predict(frame):
+    if model is None:
+        # Dummy mode nếu sai model
+        import random
+        fruit_idx = random.randint(0, len(FRUIT_CLASSES)-1)
+        fruit_prob = random.uniform(0.85, 0.99)
+        quality_idx = random.randint(0, 2)
+        return build_result(fruit_idx, fruit_prob, quality_idx)
+
+    img = preprocess_frame(frame)
+    try:
+        outputs = model.predict(img, verbose=0)
+        fruit_probs = outputs[0]
+        # quality_probs = outputs[1][0]
+        # defect_probs = outputs[2][0]
+
+        fruit_idx = np.argmax(fruit_probs)
+        fruit_prob = fruit_probs[fruit_idx]
+    except Exception as e:
+        print(f"Lỗi predict: {e}")
+        return None
+
+    return build_result(fruit_idx, fruit_prob)
+
+def predict_batch(frames):
+    # Dự đoán nhiều frame trong một lần gọi model (dùng cho camera_service)
+    if model is None:
+        return [predict(frame) for frame in frames]
+
+    try:
+        batch = np.concatenate([preprocess_frame(frame) for frame in frames], axis=0)
+        # Gọi model trực tiếp: với batch nhỏ nhanh hơn model.predict() nhiều
+        outputs = np.asarray(model(batch, training=False))
+    except Exception as e:
+        print(f"Lỗi predict: {e}")
+        return [None] * len(frames)
+
+    results = []
+    for fruit_probs in outputs:
+        fruit_idx = np.argmax(fruit_probs)
+        results.append(build_result(fruit_idx, fruit_probs[fruit_idx]))
+    return results
+
+# VÙNG QUÉT
+def scan_zone_bounds(frame, ratio=0.2):
+    h, w = frame.shape[:2]
+    margin_x = int(w * ratio)
+    margin_y = int(h * ratio)
+    return margin_x, margin_y, w - margin_x, h - margin_y
+
+def crop_scan_zone(frame):
+    x1, y1, x2, y2 = scan_zone_bounds(frame)
+    scan_zone = frame[y1:y2, x1:x2]
+    if scan_zone.size == 0:
+        scan_zone = frame
+    return scan_zone
+
 # VẼ KẾT QUẢ
 def draw_result(frame, result, x=10, y=30):
     if result is None:
@@ -128,10 +160,7 @@ def main():
             break
 
         h, w = frame.shape[:2]
-        margin_x = int(w * 0.2)
-        margin_y = int(h * 0.2)
-        x1, y1 = margin_x, margin_y
-        x2, y2 = w - margin_x, h - margin_y
+        x1, y1, x2, y2 = scan_zone_bounds(frame)
 
         # Khung mặc định ĐỎ
         border_color = (0, 0, 255)
@@ -139,9 +168,7 @@ def main():
         show_warning = True
 
         # Lấy vùng quét
-        scan_zone = frame[y1:y2, x1:x2]
-        if scan_zone.size == 0:
-            scan_zone = frame
+        scan_zone = crop_scan_zone(frame)
 
         current_time = time.time()
         if current_time - last_predict_time > predict_interval:
@@ -9,6 +9,7 @@ from tensorflow.keras.models import load_model
 from tensorflow.keras.preprocessing.image import img_to_array
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from utils import decode_image
 
 # Cấu hình logging
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +26,11 @@ FRUIT_CLASSES_PATH = '../data/fruit_classes.txt'
 CONFIDENCE_THRESHOLD = 0.70
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+ALLOWED_FORMATS = ('png', 'jpeg', 'webp')  # định dạng thật, nhận dạng từ magic bytes
+# Ảnh JPEG 50 MP từ điện thoại có thể tới ~30 MB; giới hạn thật là số pixel trong header
+MAX_UPLOAD_BYTES = 64 * 1024 * 1024
+
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
 
 #  LOAD DỮ LIỆU 
 def load_fruit_data():
@@ -118,6 +124,10 @@ def predict(image):
         return {"error": str(e)}
 
 #  API
+@app.errorhandler(413)
+def file_too_large(e):
+    return jsonify({'error': f'File quá lớn (tối đa {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)'}), 413
+
 @app.route('/predict', methods=['POST'])
 def upload_file():
     logger.info("New request")
@@ -133,10 +143,8 @@ def upload_file():
         return jsonify({'error': 'File không hợp lệ'}), 400
 
     try:
-        file_bytes = np.frombuffer(file.read(), np.uint8)
-        image = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
-        if image is None:
-            raise ValueError("Không decode được ảnh")
+        # Kiểm tra header + decode ở độ phân giải giảm thay vì decode full-size
+        image = decode_image(file.read(), IMG_SIZE, ALLOWED_FORMATS)
 
         # Dự đoán
         result = predict(image)
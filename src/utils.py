@@ -0,0 +1,12 @@
+# utils.py
+# Đọc header / decode ảnh dùng chung với web app: code nằm trong
+# page/app/utils (image_header.py, image_decode.py), script trong src/ import từ đó.
+import os
+import sys
+
+PAGE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'page'))
+if PAGE_DIR not in sys.path:
+    sys.path.append(PAGE_DIR)
+
+from app.utils.image_decode import decode_image, reduced_imread_flag  # noqa: E402
+from app.utils.image_header import check_image_header, read_image_header  # noqa: E402